@@ -1,11 +1,28 @@
+# patch blocking socket calls before anything else is imported so that
+# gevent workers can serve other requests while one waits on YouTube or the db
+from gevent import monkey
+monkey.patch_all()
+
+from psycogreen.gevent import patch_psycopg
+patch_psycopg()
+
 import os
+import pickle
+from functools import wraps
 
-from flask import Flask, render_template, g, session, request, jsonify, flash, redirect
+from flask import Flask, render_template, g, session, request, jsonify, flash, redirect, make_response
 
+from flask_caching import Cache
 from flask_debugtoolbar import DebugToolbarExtension
-from sqlalchemy import func
+from flask_session import Session
+from sqlalchemy import bindparam, case, func
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext import baked
+from sqlalchemy.orm import joinedload, selectinload
+import orjson
+import redis
 import requests
+from requests.adapters import HTTPAdapter
 
 from forms import UserAddForm, LoginForm, CourseAddForm, CourseSearchForm
 
@@ -18,34 +35,144 @@ from models import db, connect_db, User, Course, Video, VideoCourse
 API_SECRET_KEY = os.environ.get('API_SECRET_KEY')
 
 CURR_USER_KEY = "curr_user"
+USER_CACHE_TTL = 300
+DEFAULT_IMAGE_URL = User.image_url.default.arg
+ANON_PAGE_MAX_AGE = 600
+YT_SEARCH_CACHE_TTL = 600
+YT_VIDEO_CACHE_TTL = 86400
 API_BASE_URL = "https://www.googleapis.com/youtube/v3"
 
+# reuse keep-alive connections to the YouTube Data API across requests
+YT_SESSION = requests.Session()
+YT_SESSION.mount("https://", HTTPAdapter(pool_connections=10, pool_maxsize=50, max_retries=3))
+YT_TIMEOUT = (3, 10)
+
+# query params shared by every call to the YouTube Data API search and videos methods
+SEARCH_PARAMS_BASE = {"part": "snippet",
+                      "type": "video",
+                      "order": "relevance",
+                      # only return the fields used by create_list_of_videos
+                      "fields": "items(id/videoId,snippet(title,channelId,channelTitle,description,thumbnails/high/url))",
+                      "key": API_SECRET_KEY}
+VIDEOS_PARAMS_BASE = {"part": "player",
+                      "key": API_SECRET_KEY}
+
 app = Flask(__name__)
 
 # Get DB_URI from environ variable (useful for production/testing) or, if not set there, use development local db.
 
 app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', 'postgres:///success_world')
 
+# Get REDIS_URL from environ variable (useful for production) or, if not set there, use development local redis.
+
+REDIS_URL = os.environ.get('REDIS_URL', 'redis://localhost:6379')
+
+redis_client = redis.Redis.from_url(REDIS_URL)
+
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 app.config['SQLALCHEMY_ECHO'] = False
+# each gevent worker serves up to 100 requests at once (see Procfile) but shares one
+# db connection pool; greenlets beyond POOL_SIZE + MAX_OVERFLOW wait for a free connection.
+# Every worker opens its own pool, so keep workers * (size + overflow) under the db plan's
+# connection limit: the defaults allow 2 workers * (10 + 20) = 60 connections, so lower
+# DB_POOL_SIZE / DB_MAX_OVERFLOW on plans with fewer connections.
+app.config['SQLALCHEMY_POOL_SIZE'] = int(os.environ.get('DB_POOL_SIZE', 10))
+app.config['SQLALCHEMY_MAX_OVERFLOW'] = int(os.environ.get('DB_MAX_OVERFLOW', 20))
 # redirects must be intercepted for some tests to pass
 app.config['DEBUG_TB_INTERCEPT_REDIRECTS'] = False
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', "another543256432secret")
+# store sessions server-side in redis instead of in signed cookies
+app.config['SESSION_TYPE'] = 'redis'
+app.config['SESSION_REDIS'] = redis_client
 
 toolbar = DebugToolbarExtension(app)
 
+Session(app)
+
+# cache rendered pages in redis
+cache = Cache(app, config={'CACHE_TYPE': 'RedisCache', 'CACHE_REDIS_URL': REDIS_URL})
+
 connect_db(app)
 
+# compile the queries that run on most requests once, then reuse them with new parameters
+bakery = baked.bakery()
+
+user_by_id = bakery(lambda session: session.query(User))
+
+courses_by_creator = bakery(lambda session: session.query(Course))
+courses_by_creator += lambda q: q.options(selectinload(Course.videos))
+courses_by_creator += lambda q: q.filter(Course.creator_id == bindparam('creator_id'))
+
 
 @app.before_request
 def add_user_to_g():
     """If we're logged in, add curr user to Flask global."""
     if CURR_USER_KEY in session:
-        g.user = User.query.get(session[CURR_USER_KEY])
+        g.user = get_curr_user(session[CURR_USER_KEY])
     else:
         g.user = None
 
 
+## ************************************************
+## HELPER FUNCTIONS - caching
+## ************************************************
+
+def skip_page_cache():
+    """Pages are only cached for visitors with an empty session:
+    no logged in user, no flashed messages waiting to be shown and no session cookie
+    (e.g. one holding the CSRF token from the login or signup form)."""
+
+    return g.get('user') is not None or bool(session)
+
+
+def anon_page_response(template, status=200):
+    """Render a page that is the same for every anon user.
+    Let browsers and CDNs cache it only when the visitor's session is empty."""
+
+    # check before rendering: base.html pops any flashed messages from the session
+    cacheable = not skip_page_cache()
+
+    res = make_response(render_template(template), status)
+
+    if cacheable:
+        # the session is empty, so no session cookie is set on this response
+        res.headers['Cache-Control'] = f'public, max-age={ANON_PAGE_MAX_AGE}'
+        # once the visitor gets a session cookie, they must not be served this copy
+        res.headers['Vary'] = 'Cookie'
+    else:
+        res.headers['Cache-Control'] = 'private, no-cache'
+
+    return res
+
+
+def cached(key, ttl):
+    """Cache the JSON returned by the decorated function in Redis.
+    key builds the Redis key from the function's arguments.
+    Cached results expire after ttl seconds.
+    Error responses from the YouTube API are not cached."""
+
+    def decorator(fn):
+
+        @wraps(fn)
+        def wrapper(*args):
+            cache_key = key(*args)
+
+            cached_json = redis_client.get(cache_key)
+            if cached_json is not None:
+                return orjson.loads(cached_json)
+
+            res_json = fn(*args)
+
+            if "error" not in res_json:
+                redis_client.setex(cache_key, ttl, orjson.dumps(res_json))
+
+            return res_json
+
+        return wrapper
+
+    return decorator
+
+
 # *******************************
 # API ENDPOINT ROUTE
 # *******************************
@@ -86,7 +213,10 @@ def make_demo_acct():
     """This route has no view.
     Create a demo account for an anonymous user."""
 
-    demo_old = User.query.filter_by(username="Demo", email="demo@demo.com").delete()
+    demo_old = User.query.filter_by(username="Demo", email="demo@demo.com")
+    for (demo_old_id,) in demo_old.with_entities(User.id):
+        uncache_user(demo_old_id)
+    demo_old.delete()
     user = signup_demo_user()
 
     do_login(user)
@@ -118,7 +248,7 @@ def signup():
                 password=form.password.data,
                 first_name=form.first_name.data,
                 last_name=form.last_name.data,
-                image_url=form.image_url.data or User.image_url.default.arg,
+                image_url=form.image_url.data or DEFAULT_IMAGE_URL,
                 email=form.email.data,
             )
             db.session.commit()
@@ -177,8 +307,9 @@ def list_user_courses(user_id):
         flash("Success unauthorized.", "danger")
         return redirect("/")
 
-    courses = Course.query.filter(
-        Course.creator_id == user_id).all()
+    courses = (courses_by_creator(db.session())
+               .params(creator_id=user_id)
+               .all())
 
     return render_template(f"users/courses.html", courses=courses)
 
@@ -217,33 +348,39 @@ def add_video_to_course(course_id, yt_video_id):
     Add video sequence number (within the course) to the database.
     Redirect back to video search page."""
 
-    course = Course.query.get_or_404(course_id)
-
     if not g.user:
         flash("Success unauthorized.", "danger")
         return redirect("/")
 
+    course = Course.query.get_or_404(course_id)
+
     if course.creator_id != g.user.id:
         flash("Success unauthorized", "danger")
         return redirect("/")
 
     # create video & add to db if not already there
     form_data = request.form
-    video = add_video_to_db(form_data, yt_video_id)
-
-    # Query the db for this course
-    course = Course.query.get_or_404(course_id)
+    video_id = add_video_to_db(form_data, yt_video_id)
 
     # is the video already part of the course?
-    if video in course.videos:
+    video_in_course = (db.session
+                       .query(VideoCourse.id)
+                       .filter_by(course_id=course_id, video_id=video_id)
+                       .first())
+
+    if video_in_course:
         flash("This video has already been added to the course.", "warning")
         return redirect(f'../../../../courses/{course_id}/videos/search')
 
-    video_seq = len(course.videos) + 1
+    # count the course's videos in the db rather than loading them all
+    video_seq = (db.session
+                 .query(func.count(VideoCourse.id))
+                 .filter_by(course_id=course_id)
+                 .scalar()) + 1
 
     # CHANGE: QUESTION: is this the best way to add a record to a join table???
     video_course = VideoCourse(course_id=course_id,
-                               video_id=video.id,
+                               video_id=video_id,
                                video_seq=video_seq)
 
     db.session.add(video_course)
@@ -277,20 +414,20 @@ def courses_add():
 
     # form validation
     if form.validate_on_submit():
-        # check to see if course already exists for this creator
-        course = Course.query.filter(
-            Course.title == form.title.data, Course.creator_id == g.user.id).first()
-
-        # if course already exists
-        if course:
-            flash("You have already created a course with this name. Please choose a new name.", "warning")        
-        # if course does not yet exist, create it & save to db
-        else:
+        # try to create the course & save to db
+        try:
             course = Course(title=form.title.data,
                             description=form.description.data,
                             creator_id=g.user.id)
             db.session.add(course)
             db.session.commit()
+
+        # if course already exists for this creator (courses_creator_title_uniq)
+        except IntegrityError:
+            db.session.rollback()
+            flash("You have already created a course with this name. Please choose a new name.", "warning")
+
+        else:
             flash(
                 f'Your course "{course.title}" was created successfully.', 'success')
 
@@ -309,18 +446,29 @@ def courses_search():
         flash("Success unauthorized.", "danger")
         return redirect("/")
 
+    MAX_RESULTS = 50
+
     form = CourseSearchForm()
-    courses = Course.query.all()
+    courses_query = Course.query.options(selectinload(Course.videos))
+    newest_courses = (courses_query
+                      .order_by(Course.id.desc())
+                      .limit(MAX_RESULTS))
 
     if form.validate_on_submit():
         phrase = (form.phrase.data)
-        phrase_lower = phrase.lower()
         # if no search phrase was provided by user
-        if not phrase_lower:
-            flash('No search term found; showing all courses', "info")
+        if not phrase:
+            courses = newest_courses.all()
+            flash('No search term found; showing the newest courses', "info")
         # if search phrase was provided by user
         else:
-            courses = Course.query.filter(func.lower(Course.title).contains(f"{phrase_lower}")).all()
+            # ILIKE on title can use the courses_title_trgm index;
+            # the closest trigram matches are shown first
+            courses = (courses_query
+                       .filter(Course.title.ilike(f"%{phrase}%"))
+                       .order_by(func.similarity(Course.title, phrase).desc())
+                       .limit(MAX_RESULTS)
+                       .all())
             # if no courses were returned from the search
             if len(courses) == 0:
                 flash(
@@ -330,6 +478,10 @@ def courses_search():
                 flash(
                     f'Showing courses with titles matching phrases similar to {phrase}', "info")
 
+    else:
+        # show the newest courses until a search is submitted
+        courses = newest_courses.all()
+
     return render_template('/courses/search.html', form=form, courses=courses)
 
 
@@ -352,6 +504,7 @@ def courses_edit(course_id):
 
     videos_courses_asc = (VideoCourse
                           .query
+                          .options(joinedload(VideoCourse.video))
                           .filter(VideoCourse.course_id == course_id)
                           .order_by(VideoCourse.video_seq)
                           .all())
@@ -370,6 +523,7 @@ def courses_details(course_id):
     course = Course.query.get_or_404(course_id)
     videos_courses_asc = (VideoCourse
                           .query
+                          .options(joinedload(VideoCourse.video))
                           .filter(VideoCourse.course_id == course_id)
                           .order_by(VideoCourse.video_seq)
                           .all())
@@ -394,30 +548,30 @@ def courses_resequence(course_id):
         flash("Success unauthorized", "danger")
         return redirect("/")
 
-    # get the video data from the form
-    video_id = request.form.get('video-id')
-    vc_id = request.form.get('vc-id')
-    video_seq = int(request.form.get('video-seq'))
-
-    arrow = request.form.get('arrow')
-    arrow = int(arrow)
+    # get the video data from the form (None if missing or not a number)
+    vc_id = request.form.get('vc-id', type=int)
+    video_seq = request.form.get('video-seq', type=int)
+    arrow = request.form.get('arrow', type=int)
 
+    # nothing to move; re-render the course edit page unchanged
+    if vc_id is None or video_seq is None or arrow not in (-1, 1):
+        return redirect(f'../../../courses/{course_id}/edit')
 
-    vc = VideoCourse.query.filter(VideoCourse.id == vc_id).all()
+    # get the video being moved and the video it trades places with in one query
+    vcs = VideoCourse.query.filter(
+        VideoCourse.course_id == course_id,
+        VideoCourse.video_seq.in_([video_seq, video_seq + arrow])).all()
 
-    vc_switch = VideoCourse.query.filter(VideoCourse.course_id == course_id,
-        VideoCourse.video_seq == (video_seq + arrow)).all()
+    if len(vcs) == 2 and vc_id in [vc.id for vc in vcs]:
 
-    if len(vc) == 1 and len(vc_switch) == 1:
-
-        # update with new video_course_video_seq
-        temp_seq_1 = -1
-        # curr_seq = video_seq
-        vc[0].video_seq = temp_seq_1
-        db.session.commit()
-        vc_switch[0].video_seq = video_seq
-        db.session.commit()
-        vc[0].video_seq = video_seq + arrow
+        # swap the two video_seq values with a single UPDATE
+        # (the unique constraint on video_seq is checked at the end of the statement)
+        VideoCourse.query.filter(
+            VideoCourse.id.in_([vc.id for vc in vcs])
+        ).update({VideoCourse.video_seq: case(
+            [(VideoCourse.id == vc_id, video_seq + arrow)],
+            else_=video_seq)},
+            synchronize_session=False)
         db.session.commit()
 
     # re-render the course edit page
@@ -453,7 +607,6 @@ def remove_video(course_id):
     # if no other courses use this video, remove the video from the db (the delete will cascade to the videos_courses table)
     if len(videos_courses) == 1:
         Video.query.filter(Video.id == video_id).delete()
-        db.session.commit()
 
     # otherwise leave video in the db and remove the corresponding entry from videos_courses table only
     else:
@@ -461,16 +614,15 @@ def remove_video(course_id):
             VideoCourse.course_id == course.id,
             VideoCourse.video_id == video_id
         ).delete()
-        db.session.commit()
 
-    # resequence the remaining videos in the course
-    vc_reorder = VideoCourse.query.filter(
+    # resequence the remaining videos in the course with a single UPDATE,
+    # committed together with the delete so the course is never left with a gap in video_seq
+    VideoCourse.query.filter(
         VideoCourse.course_id == course.id,
         VideoCourse.video_seq > video_seq
-    )
-
-    for vc in vc_reorder:
-        vc.video_seq = vc.video_seq - 1
+    ).update({VideoCourse.video_seq: VideoCourse.video_seq - 1},
+             synchronize_session=False)
+    db.session.commit()
 
     # re-render the course edit page without the removed video
     return redirect(f'../../../courses/{course_id}/edit')
@@ -480,13 +632,15 @@ def remove_video(course_id):
 # ************************************
 
 @app.errorhandler(404)
+@cache.cached(timeout=ANON_PAGE_MAX_AGE, key_prefix='view/404', unless=skip_page_cache)
 def page_not_found(error):
     """Handle 404 errors by showing custom 404 page."""
 
-    return render_template('404.html'), 404
+    return anon_page_response('404.html', 404)
 
 
 @app.route("/")
+@cache.cached(timeout=ANON_PAGE_MAX_AGE, unless=skip_page_cache)
 def homepage():
     """Show homepage.
 
@@ -496,7 +650,7 @@ def homepage():
     if g.user:
         return render_template('home.html')
     else:
-        return render_template('home-anon.html')
+        return anon_page_response('home-anon.html')
 
 
 ## ************************************************
@@ -544,18 +698,21 @@ def get_yt_videos(keyword):
     return res_json
 
 
+@cached(key=lambda keyword, max_results: f"yt:search:{max_results}:{keyword.lower()}", ttl=YT_SEARCH_CACHE_TTL)
 def yt_search(keyword, max_results):
     """Retrieve videos by keyword.
     Limit results to number in max_results.
     Return JSON response."""
 
     # search for video data
-    res = requests.get(
-        f"{API_BASE_URL}/search/?part=snippet&maxResults={max_results}&type=video&q={keyword}&order=relevance&key={API_SECRET_KEY}"
+    res = YT_SESSION.get(
+        f"{API_BASE_URL}/search/",
+        params={**SEARCH_PARAMS_BASE, "maxResults": max_results, "q": keyword},
+        timeout=YT_TIMEOUT
     )
 
     # turn search results into json
-    res_json = res.json()
+    res_json = orjson.loads(res.content)
 
     return res_json
 
@@ -563,32 +720,27 @@ def yt_search(keyword, max_results):
 # create list of dicts containing info & data re: individual videos
 def create_list_of_videos(items):
 
-    videos_data = []
-
-    for video in items:
-
-        video_data = {}
-        # add video data to video_data dict
-        video_data["ytVideoId"] = video['id']['videoId']
-        video_data["title"] = video['snippet']['title']
-        video_data["channelId"] = video['snippet']['channelId']
-        video_data["channelTitle"] = video['snippet']['channelTitle']
-        video_data["description"] = video['snippet']['description']
-        video_data["thumb_url_medium"] = video['snippet']['thumbnails']['high']['url']
-
-        videos_data.append(video_data)
-
-    return videos_data
+    return [{
+        "ytVideoId": video['id']['videoId'],
+        "title": video['snippet']['title'],
+        "channelId": video['snippet']['channelId'],
+        "channelTitle": video['snippet']['channelTitle'],
+        "description": video['snippet']['description'],
+        "thumb_url_medium": video['snippet']['thumbnails']['high']['url'],
+    } for video in items]
 
 
+@cached(key=lambda yt_video_id: f"yt:video:{yt_video_id}", ttl=YT_VIDEO_CACHE_TTL)
 def yt_videos(yt_video_id):
     """Make API call to YouTube Data API.
     Return the result in JSON format."""
 
-    res = requests.get(
-        f"{API_BASE_URL}/videos?part=player&id={yt_video_id}&key={API_SECRET_KEY}"
+    res = YT_SESSION.get(
+        f"{API_BASE_URL}/videos",
+        params={**VIDEOS_PARAMS_BASE, "id": yt_video_id},
+        timeout=YT_TIMEOUT
     )
-    videos_json = res.json()
+    videos_json = orjson.loads(res.content)
 
     return videos_json
 
@@ -597,40 +749,78 @@ def yt_videos(yt_video_id):
 ## *********************************
 
 def add_video_to_db(form_data, yt_video_id):
-    """Add a video to the database."""
-
-    # CHANGE: should .first() be .one_or_none instead?
-    video = Video.query.filter(Video.yt_video_id == yt_video_id).first()
-
-    if not video:
-        # CHANGE: is there a more efficient way to do this?
-        # get video info from hidden form fields
-        # CHANGE: pull this out into a helper function
-        title = form_data.get('v-title', None)
-        description = form_data.get('v-description', None)
-        channelId = form_data.get('v-channelId', None)
-        channelTitle = form_data.get('v-channelTitle', None)
-        thumb_url = form_data.get('v-thumb-url', None)
-
-        # create new video
-        # CHANGE: pull this out into a helper function
-        video = Video(title=title,
-                      description=description,
-                      yt_video_id=yt_video_id,
-                      yt_channel_id=channelId,
-                      yt_channel_title=channelTitle,
-                      thumb_url=thumb_url)
+    """Add a video to the database if it is not there already.
+    Return the video's id."""
+
+    # only the id is needed, so don't load the whole video
+    video_id = (db.session
+                .query(Video.id)
+                .filter_by(yt_video_id=yt_video_id)
+                .limit(1)
+                .scalar())
+
+    if video_id is None:
+        video = make_video(form_data, yt_video_id)
 
         # add new video to database
         db.session.add(video)
         db.session.commit()
+        video_id = video.id
+
+    return video_id
+
+
+def make_video(form_data, yt_video_id):
+    """Create a (not yet saved) video from the hidden form fields."""
+
+    # get video info from hidden form fields
+    title = form_data.get('v-title', None)
+    description = form_data.get('v-description', None)
+    channelId = form_data.get('v-channelId', None)
+    channelTitle = form_data.get('v-channelTitle', None)
+    thumb_url = form_data.get('v-thumb-url', None)
 
-    return video
+    return Video(title=title,
+                 description=description,
+                 yt_video_id=yt_video_id,
+                 yt_channel_id=channelId,
+                 yt_channel_title=channelTitle,
+                 thumb_url=thumb_url)
 
 # *******************************
 # HELPER FUNCTIONS: user routes
 # *******************************
 
+def get_curr_user(user_id):
+    """Get the logged in user from the redis cache.
+    On a cache miss, query the db and cache the user."""
+
+    cached_user = redis_client.get(f"user:{user_id}")
+
+    if cached_user is not None:
+        # attach the cached user to the db session without querying the db
+        return db.session.merge(pickle.loads(cached_user), load=False)
+
+    user = user_by_id(db.session()).get(user_id)
+
+    if user:
+        redis_client.setex(f"user:{user_id}", USER_CACHE_TTL, pickle.dumps(user))
+
+    return user
+
+
+def uncache_user(user_id):
+    """Remove a user from the redis cache."""
+    redis_client.delete(f"user:{user_id}")
+
+
+def clear_user_cache():
+    """Remove every user from the redis cache.
+    Use this when users are dropped and recreated (e.g. when seeding the db)."""
+    for cache_key in redis_client.scan_iter("user:*"):
+        redis_client.delete(cache_key)
+
+
 def do_login(user):
     """Log in user."""
     session[CURR_USER_KEY] = user.id
@@ -640,6 +830,7 @@ def do_logout():
     """Logout user."""
 
     if CURR_USER_KEY in session:
+        uncache_user(session[CURR_USER_KEY])
         del session[CURR_USER_KEY]
         g.user = None
 
@@ -651,7 +842,7 @@ def signup_demo_user():
         password="demodemo",
         first_name="Demo",
         last_name="Demo",
-        image_url=User.image_url.default.arg,
+        image_url=DEFAULT_IMAGE_URL,
         email="demo@demo.com",
     )
     db.session.add(user)
@@ -660,62 +851,53 @@ def signup_demo_user():
     return user
 
 def populate_demo_data():
-    """Make a course for the demo account and add videos to it."""
+    """Make a course for the demo account and add videos to it.
+    Everything is saved in a single transaction."""
 
     # create a course owned by demo user
     course = Course(title="PMP Test Preparation",
                     description="Learn everything you need to know to pass the PMP on your first try.",
                     creator_id=g.user.id)
     db.session.add(course)
-    db.session.commit()
 
-    # add video1 to database and the course
-    video1 = {"v-title": "PMP Exam Questions And Answers - PMP Certification- PMP Exam Prep (2020) - Video 1",
-            "v-description": "Lot of people think that solving thousands of PMP exam questions and answers will be the deal breaker in there PMP exam prep program. I am not 100% ...",
-            "yt_video_id": "slJRAbvvAr8",
-            "v-channelId": "UCij4PbZVBmFbUYieXQmt6lQ",
-            "v-channelTitle": "EduHubSpot",
-            "v-thumb-url": "https://i.ytimg.com/vi/slJRAbvvAr8/hqdefault.jpg"}
-    add_video_to_db(video1, video1["yt_video_id"])
-    video1_db = Video.query.filter(Video.yt_video_id == video1["yt_video_id"]).first()
-    
-    video1_seq = len(course.videos) + 1
-    video_course1 = VideoCourse(course_id=course.id,
-                               video_id=video1_db.id,
-                               video_seq=video1_seq)
-    db.session.add(video_course1)
+    demo_videos = [
+        {"v-title": "PMP Exam Questions And Answers - PMP Certification- PMP Exam Prep (2020) - Video 1",
+         "v-description": "Lot of people think that solving thousands of PMP exam questions and answers will be the deal breaker in there PMP exam prep program. I am not 100% ...",
+         "yt_video_id": "slJRAbvvAr8",
+         "v-channelId": "UCij4PbZVBmFbUYieXQmt6lQ",
+         "v-channelTitle": "EduHubSpot",
+         "v-thumb-url": "https://i.ytimg.com/vi/slJRAbvvAr8/hqdefault.jpg"},
+        {"v-title": "PMP® Certification Full Course - Learn PMP Fundamentals in 12 Hours | PMP® Training Videos | Edureka",
+         "v-description": "Edureka PMP® Certification Training: https://www.edureka.co/pmp-certification-exam-training This Edureka PMP® Certification Full Course video will help you ...",
+         "yt_video_id": "vzqDTSZOTic",
+         "v-channelId": "UCkw4JCwteGrDHIsyIIKo4tQ",
+         "v-channelTitle": "edureka!",
+         "v-thumb-url": "https://i.ytimg.com/vi/vzqDTSZOTic/hqdefault.jpg"},
+        {"v-title": "PMP Exam Prep 25 What would you do next questions with Aileen",
+         "v-description": "In this video, 25 what would you do next questions for the PMP Exam, Aileen reviews the strategy to address the many what would you do next questions on the ...",
+         "yt_video_id": "MQ0f7WLYTlI",
+         "v-channelId": "UCzl_4rhvVtjJ_rSIC1HRvmw",
+         "v-channelTitle": "Aileen Ellis",
+         "v-thumb-url": "https://i.ytimg.com/vi/MQ0f7WLYTlI/hqdefault.jpg"},
+    ]
+
+    # reuse any demo videos that are already in the db (one query for all of them)
+    yt_video_ids = [video_data["yt_video_id"] for video_data in demo_videos]
+    videos_in_db = {video.yt_video_id: video for video in
+                    Video.query.filter(Video.yt_video_id.in_(yt_video_ids))}
+
+    videos = [videos_in_db.get(video_data["yt_video_id"]) or
+              make_video(video_data, video_data["yt_video_id"])
+              for video_data in demo_videos]
+
+    # flush (without committing) so the course and new videos get their ids
+    db.session.add_all(videos)
+    db.session.flush()
+
+    videos_courses = [VideoCourse(course_id=course.id,
+                                  video_id=video.id,
+                                  video_seq=video_seq)
+                      for video_seq, video in enumerate(videos, start=1)]
+
+    db.session.add_all(videos_courses)
     db.session.commit()
-
-    # add video2 to database and the course
-    video2 = {"v-title": "PMP® Certification Full Course - Learn PMP Fundamentals in 12 Hours | PMP® Training Videos | Edureka",
-            "v-description": "Edureka PMP® Certification Training: https://www.edureka.co/pmp-certification-exam-training This Edureka PMP® Certification Full Course video will help you ...",
-            "yt_video_id": "vzqDTSZOTic",
-            "v-channelId": "UCkw4JCwteGrDHIsyIIKo4tQ",
-            "v-channelTitle": "edureka!",
-            "v-thumb-url": "https://i.ytimg.com/vi/vzqDTSZOTic/hqdefault.jpg"}
-    add_video_to_db(video2, video2["yt_video_id"])
-    video2_db = Video.query.filter(Video.yt_video_id == video2["yt_video_id"]).first()
-
-    video2_seq = len(course.videos) + 1
-    video_course2 = VideoCourse(course_id=course.id,
-                               video_id=video2_db.id,
-                               video_seq=video2_seq)
-    db.session.add(video_course2)
-    db.session.commit()
-
-    # add video3 to database and the course
-    video3 = {"v-title": "PMP Exam Prep 25 What would you do next questions with Aileen",
-            "v-description": "In this video, 25 what would you do next questions for the PMP Exam, Aileen reviews the strategy to address the many what would you do next questions on the ...",
-            "yt_video_id": "MQ0f7WLYTlI",
-            "v-channelId": "UCzl_4rhvVtjJ_rSIC1HRvmw",
-            "v-channelTitle": "Aileen Ellis",
-            "v-thumb-url": "https://i.ytimg.com/vi/MQ0f7WLYTlI/hqdefault.jpg"}
-    add_video_to_db(video3, video3["yt_video_id"])
-    video3_db = Video.query.filter(Video.yt_video_id == video3["yt_video_id"]).first()
-
-    video3_seq = len(course.videos) + 1
-    video_course3 = VideoCourse(course_id=course.id,
-                               video_id=video3_db.id,
-                               video_seq=video3_seq)
-    db.session.add(video_course3)
-    db.session.commit()
\ No newline at end of file
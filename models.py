@@ -2,6 +2,7 @@
 
 from flask_bcrypt import Bcrypt
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import DDL, event
 
 bcrypt = Bcrypt()
 db = SQLAlchemy()
@@ -117,9 +118,17 @@ class Course(db.Model):
         nullable=False,
     )
 
-    db.UniqueConstraint(title, creator_id)
+    # a creator can't have two courses with the same title
+    db.Index('courses_creator_title_uniq', creator_id, title, unique=True)
 
-    creator = db.relationship('User', backref='courses')
+    # trigram index so that ILIKE '%phrase%' searches on title avoid a full table scan
+    db.Index('courses_title_trgm', title,
+             postgresql_using='gin',
+             postgresql_ops={'title': 'gin_trgm_ops'})
+
+    # nothing reads course.creator (views use creator_id); raise rather than
+    # silently emit a SELECT per course if a template starts using it
+    creator = db.relationship('User', backref='courses', lazy='raise')
 
     videos = db.relationship(
         'Video', secondary='videos_courses', backref='courses')
@@ -131,6 +140,11 @@ class Course(db.Model):
         return f"<Course #{self.id}: {self.title}, {self.creator_id}>"
 
 
+# the trigram index on courses.title needs the pg_trgm extension
+event.listen(Course.__table__, 'before_create',
+             DDL('CREATE EXTENSION IF NOT EXISTS pg_trgm'))
+
+
 class Video(db.Model):
     """Video information and data"""
 
@@ -196,9 +210,10 @@ class VideoCourse(db.Model):
         nullable=False,
     )
 
-    db.UniqueConstraint(course_id, video_id, video_seq)
+    # deferrable so that videos can swap video_seq values in a single UPDATE
+    db.UniqueConstraint(course_id, video_id, video_seq, deferrable=True)
 
-    db.UniqueConstraint(course_id, video_seq)
+    db.UniqueConstraint(course_id, video_seq, deferrable=True)
 
 
 def connect_db(app):
@@ -2,13 +2,16 @@
 
 import csv
 from csv import DictReader
-from app import db
+from app import db, clear_user_cache
 from models import User, Course, Video, VideoCourse
 
 
 db.drop_all()
 db.create_all()
 
+# users are recreated with the same ids, so drop any cached copies of the old ones
+clear_user_cache()
+
 print('************************')
 
 with open('generator/users.csv') as users:
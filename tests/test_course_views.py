@@ -15,8 +15,11 @@ from models import db, User, Course, Video, VideoCourse
 
 os.environ['DATABASE_URL'] = "postgresql:///success-world-test"
 
+# use a separate redis db too, so the tests never clear the development cache
+os.environ['REDIS_URL'] = "redis://localhost:6379/15"
+
 # Now we can import app
-from app import app, CURR_USER_KEY
+from app import app, CURR_USER_KEY, clear_user_cache
 
 app.config['TESTING'] = True
 app.config['DEBUG_TB_HOSTS'] = ['dont-show-debug-toolbar']
@@ -42,6 +45,8 @@ class CourseViewsTestCase(TestCase):
         # drop the database tables and recreate them
         db.drop_all()
         db.create_all()
+        # users are recreated with the same ids, so drop any cached copies of the old ones
+        clear_user_cache()
 
         user1 = User.signup("allison@allison.com", "allison", "allison", "Allison", "McAllison", None)
         user1.id = 1111
@@ -183,7 +188,7 @@ class CourseViewsTestCase(TestCase):
             self.assertIn("Access unauthorized", str(res.data))            
 
     def test_course_search_no_search_term(self):
-        """When a logged in user executes a search for courses without providing a search term, all courses should be returned and shown."""
+        """When a logged in user executes a search for courses without providing a search term, the newest courses should be returned and shown."""
 
         with self.client as c:
             with c.session_transaction() as sess:
@@ -192,7 +197,7 @@ class CourseViewsTestCase(TestCase):
             res = c.post("/courses/search", 
                             data={"phrase": ""})
 
-            self.assertIn('No search term found; showing all courses', str(res.data))
+            self.assertIn('No search term found; showing the newest courses', str(res.data))
 
     def test_course_search_no_search_match(self):
         """When a logged in user executes a search for courses and no courses match the search term, """
@@ -268,6 +273,12 @@ class CourseViewsTestCase(TestCase):
             res = c.post("/courses/1/videos/remove", data=data, follow_redirects=True)
             self.assertNotIn("Desc for Video1", str(res.data))
 
+            # the remaining video moves up from video_seq 2 to 1
+            vcs = VideoCourse.query.filter(VideoCourse.course_id == self.c_id).all()
+            self.assertEqual(len(vcs), 1)
+            self.assertEqual(vcs[0].id, self.vc2_id)
+            self.assertEqual(vcs[0].video_seq, 1)
+
 
     def test_course_remove_video_not_creator_fail(self):
         """A logged in user should not be able to remove a video from a course he/she did not create."""
@@ -306,6 +317,25 @@ class CourseViewsTestCase(TestCase):
             self.assertEqual(vc1[0].video_seq, 2)
             self.assertEqual(vc2[0].video_seq, 1)
 
+    def test_course_move_video_missing_vc_id(self):
+        """A resequence request without a vc-id should leave the course unchanged instead of erroring."""
+
+        with self.client as c:
+            with c.session_transaction() as sess:
+                sess[CURR_USER_KEY] = self.user2.id
+
+            data={"course-id": "1", "video-seq": "2", "arrow": "-1"}
+            res = c.post(f"courses/{self.c_id}/videos/resequence", data=data)
+
+            self.assertEqual(res.status_code, 302)
+
+            vc1 = VideoCourse.query.filter(VideoCourse.course_id == self.c_id, VideoCourse.id == self.vc1_id).all()
+
+            vc2 = VideoCourse.query.filter(VideoCourse.course_id == self.c_id, VideoCourse.id == self.vc2_id).all()
+
+            self.assertEqual(vc1[0].video_seq, 1)
+            self.assertEqual(vc2[0].video_seq, 2)
+
     def test_course_move_video_up_not_creator_fail(self):
         """A logged in user should not be able to reorder the videos in a course he/she did not create."""
 
@@ -5,7 +5,6 @@
 #    python -m unittest test_video_model.py
 
 
-from app import app
 import os
 from unittest import TestCase
 from sqlalchemy import exc
@@ -19,6 +18,9 @@ from models import db, User, Course, Video, VideoCourse
 
 os.environ['DATABASE_URL'] = "postgresql:///success-world-test"
 
+# use a separate redis db too, so the tests never clear the development cache
+os.environ['REDIS_URL'] = "redis://localhost:6379/15"
+
 # Now we can import app
 from app import app
 
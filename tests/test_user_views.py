@@ -5,7 +5,9 @@
 #    python -m unittest test_user_views.py
 
 import os
+import pickle
 from unittest import TestCase
+from unittest.mock import patch
 from models import db, User, Course, Video, VideoCourse
 
 # BEFORE we import our app, let's set an environmental variable
@@ -15,8 +17,11 @@ from models import db, User, Course, Video, VideoCourse
 
 os.environ['DATABASE_URL'] = "postgresql:///success-world-test"
 
+# use a separate redis db too, so the tests never clear the development cache
+os.environ['REDIS_URL'] = "redis://localhost:6379/15"
+
 # Now we can import app
-from app import app, CURR_USER_KEY
+from app import app, CURR_USER_KEY, cache, redis_client, clear_user_cache
 
 app.config['TESTING'] = True
 app.config['DEBUG_TB_HOSTS'] = ['dont-show-debug-toolbar']
@@ -42,6 +47,9 @@ class UserViewsTestCase(TestCase):
         # drop the database tables and recreate them
         db.drop_all()
         db.create_all()
+        # users are recreated with the same ids, so drop any cached copies of the old ones
+        clear_user_cache()
+        cache.clear()
 
         user1 = User.signup("allison@allison.com", "allison", "allison", "Allison", "McAllison", None)
         user1.id = 1111
@@ -130,4 +138,101 @@ class UserViewsTestCase(TestCase):
             res = c.get("/logout", follow_redirects=True)
 
             self.assertIn("Welcome back.</p>", str(res.data))
-            self.assertIn("Log in</button>", str(res.data))
\ No newline at end of file
+            self.assertIn("Log in</button>", str(res.data))
+
+    def test_curr_user_cached(self):
+        """The logged in user should be cached in redis after a request."""
+
+        with self.client as c:
+            with c.session_transaction() as sess:
+                sess[CURR_USER_KEY] = self.user1.id
+
+            c.get("/")
+
+            cached_user = pickle.loads(redis_client.get("user:1111"))
+            self.assertEqual(cached_user.id, 1111)
+            self.assertEqual(cached_user.username, "allison")
+
+    def test_curr_user_cache_hit(self):
+        """A cached user should be used without querying the db for the user."""
+
+        with self.client as c:
+            with c.session_transaction() as sess:
+                sess[CURR_USER_KEY] = self.user1.id
+
+            c.get("/")
+
+            with patch("app.user_by_id") as user_by_id:
+                res = c.get("/")
+
+            user_by_id.assert_not_called()
+            self.assertIn('alt="allison"', str(res.data))
+
+    def test_user_logout_uncaches_user(self):
+        """Logging out should remove the user from the redis cache."""
+
+        with self.client as c:
+            with c.session_transaction() as sess:
+                sess[CURR_USER_KEY] = self.user1.id
+
+            c.get("/")
+            self.assertIsNotNone(redis_client.get("user:1111"))
+
+            c.get("/logout")
+            self.assertIsNone(redis_client.get("user:1111"))
+
+    def test_demo_acct_uncaches_old_demo_user(self):
+        """Making a new demo account should remove the old demo user from the redis cache."""
+
+        demo = User.signup("demo@demo.com", "Demo", "demodemo", "Demo", "Demo", None)
+        db.session.commit()
+        demo_id = demo.id
+
+        redis_client.set(f"user:{demo_id}", pickle.dumps(demo))
+
+        with self.client as c:
+            c.get("/users/demo")
+
+        self.assertIsNone(redis_client.get(f"user:{demo_id}"))
+
+    def test_anon_homepage_cache_control(self):
+        """The anon homepage should be publicly cacheable by browsers and CDNs."""
+
+        with self.client as c:
+            res = c.get("/")
+
+            self.assertIn("public", res.headers.get("Cache-Control", ""))
+            self.assertEqual(res.headers.get("Vary"), "Cookie")
+
+    def test_anon_homepage_with_flash_not_cached(self):
+        """An anon homepage showing a flashed message should not be publicly cacheable."""
+
+        with self.client as c:
+            # an anon request to a protected page flashes a message and redirects to the homepage
+            c.get("/courses/search")
+            res = c.get("/")
+
+            self.assertIn("Success unauthorized", str(res.data))
+            self.assertNotIn("public", res.headers.get("Cache-Control", ""))
+
+            # the next visit without a flashed message is cacheable again
+            res = c.get("/")
+
+            self.assertNotIn("Success unauthorized", str(res.data))
+            self.assertIn("public", res.headers.get("Cache-Control", ""))
+
+    def test_anon_homepage_with_session_cookie_not_cached(self):
+        """An anon visitor with a session (e.g. the login form's CSRF token) should not get a publicly cacheable homepage."""
+
+        app.config['WTF_CSRF_ENABLED'] = True
+
+        try:
+            with self.client as c:
+                # rendering the login form stores a CSRF token in the session
+                c.get("/users/login")
+                res = c.get("/")
+
+                self.assertNotIn("public", res.headers.get("Cache-Control", ""))
+                self.assertIn("private", res.headers.get("Cache-Control", ""))
+        finally:
+            app.config['WTF_CSRF_ENABLED'] = False
@@ -15,8 +15,11 @@ from models import db, User, Course, Video, VideoCourse
 
 os.environ['DATABASE_URL'] = "postgresql:///success-world-test"
 
+# use a separate redis db too, so the tests never clear the development cache
+os.environ['REDIS_URL'] = "redis://localhost:6379/15"
+
 # Now we can import app
-from app import app, CURR_USER_KEY
+from app import app, CURR_USER_KEY, clear_user_cache
 
 app.config['TESTING'] = True
 app.config['DEBUG_TB_HOSTS'] = ['dont-show-debug-toolbar']
@@ -42,6 +45,8 @@ class VideoViewTestCase(TestCase):
         # drop the database tables and recreate them
         db.drop_all()
         db.create_all()
+        # users are recreated with the same ids, so drop any cached copies of the old ones
+        clear_user_cache()
 
         user1 = User.signup("allison@allison.com", "allison", "allison", "Allison", "McAllison", None)
         user1.id = 1111
@@ -0,0 +1,108 @@
+"""YouTube API cache tests."""
+
+# run these tests like:
+#
+#    python -m unittest test_yt_cache.py
+
+import os
+from unittest import TestCase
+from unittest.mock import Mock, patch
+
+import orjson
+
+# BEFORE we import our app, let's set an environmental variable
+# to use a different database for tests (we need to do this
+# before we import our app, since that will have already
+# connected to the database
+
+os.environ['DATABASE_URL'] = "postgresql:///success-world-test"
+
+# use a separate redis db too, so the tests never clear the development cache
+os.environ['REDIS_URL'] = "redis://localhost:6379/15"
+
+# Now we can import app
+from app import app, redis_client, yt_search, yt_videos, YT_SESSION, YT_SEARCH_CACHE_TTL, YT_VIDEO_CACHE_TTL
+
+app.config['TESTING'] = True
+
+SEARCH_JSON = {"items": [{"id": {"videoId": "yfoY53QXEnI"},
+                          "snippet": {"title": "CSS for beginners",
+                                      "channelId": "video1video1",
+                                      "channelTitle": "Video1 Channel",
+                                      "description": "Desc for Video1",
+                                      "thumbnails": {"high": {"url": "https://i.ytimg.com/vi/yfoY53QXEnI/hqdefault.jpg"}}}}]}
+
+VIDEOS_JSON = {"items": [{"id": "yfoY53QXEnI", "player": {"embedHtml": "<iframe></iframe>"}}]}
+
+ERROR_JSON = {"error": {"code": 403, "message": "quotaExceeded"}}
+
+
+def yt_response(res_json):
+    """Make a fake YouTube API response with the given JSON body."""
+
+    return Mock(content=orjson.dumps(res_json))
+
+
+class YouTubeCacheTestCase(TestCase):
+    """Test caching of YouTube API responses in redis."""
+
+    def setUp(self):
+        """Clear the cache keys used by these tests."""
+
+        self.search_key = "yt:search:20:css for beginners"
+        self.video_key = "yt:video:yfoY53QXEnI"
+
+        redis_client.delete(self.search_key, self.video_key)
+
+    def tearDown(self):
+        """Remove cached test data."""
+
+        redis_client.delete(self.search_key, self.video_key)
+
+    def test_yt_search_cache_miss(self):
+        """A search that is not cached should call the API and cache the result."""
+
+        with patch.object(YT_SESSION, 'get', return_value=yt_response(SEARCH_JSON)) as yt_get:
+            res_json = yt_search("CSS for beginners", 20)
+
+        self.assertEqual(yt_get.call_count, 1)
+        self.assertEqual(res_json, SEARCH_JSON)
+        self.assertEqual(orjson.loads(redis_client.get(self.search_key)), SEARCH_JSON)
+
+        ttl = redis_client.ttl(self.search_key)
+        self.assertTrue(0 < ttl <= YT_SEARCH_CACHE_TTL)
+
+    def test_yt_search_cache_hit(self):
+        """A cached search should be returned without calling the API."""
+
+        with patch.object(YT_SESSION, 'get', return_value=yt_response(SEARCH_JSON)) as yt_get:
+            yt_search("CSS for beginners", 20)
+            # the cache key ignores the case of the keyword
+            res_json = yt_search("css FOR beginners", 20)
+
+        self.assertEqual(yt_get.call_count, 1)
+        self.assertEqual(res_json, SEARCH_JSON)
+
+    def test_yt_search_error_not_cached(self):
+        """An error response from the API should not be cached."""
+
+        with patch.object(YT_SESSION, 'get', return_value=yt_response(ERROR_JSON)) as yt_get:
+            res_json = yt_search("CSS for beginners", 20)
+            yt_search("CSS for beginners", 20)
+
+        self.assertEqual(res_json, ERROR_JSON)
+        self.assertEqual(yt_get.call_count, 2)
+        self.assertIsNone(redis_client.get(self.search_key))
+
+    def test_yt_videos_cache(self):
+        """Video player data should be cached by video id."""
+
+        with patch.object(YT_SESSION, 'get', return_value=yt_response(VIDEOS_JSON)) as yt_get:
+            yt_videos("yfoY53QXEnI")
+            res_json = yt_videos("yfoY53QXEnI")
+
+        self.assertEqual(yt_get.call_count, 1)
+        self.assertEqual(res_json, VIDEOS_JSON)
+
+        ttl = redis_client.ttl(self.video_key)
+        self.assertTrue(0 < ttl <= YT_VIDEO_CACHE_TTL)